@@ -1,3 +1,7 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
 from pydantic import BaseSettings
 
 
@@ -5,5 +9,39 @@ class Settings(BaseSettings):
     use_db: bool = True
     sqllite_db_url: str = 'sqlite:///./qupo_backend/db/finance.db'
 
+    # credentials of the quantum providers, see README.md
+    azure_tenant_id: Optional[str] = None
+    azure_client_id: Optional[str] = None
+    azure_client_secret: Optional[str] = None
+    azure_subscription_id: Optional[str] = None
+    azure_resource_group: Optional[str] = None
+    azure_name: Optional[str] = None
+    azure_location: Optional[str] = None
+    ibmq_client_secret: Optional[str] = None
+
+    class Config:
+        # resolved relative to the api folder instead of the working directory
+        env_file = Path(__file__).resolve().parent.parent / '.env'
+
+
+# callbacks dropping objects built from the cached settings, e.g. provider connections
+_refresh_callbacks = []
+
+
+def on_settings_refresh(callback):
+    _refresh_callbacks.append(callback)
+    return callback
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    # environment variables and the .env file are parsed only once per process
+    return Settings()
+
 
-settings = Settings()
+def refresh_settings() -> Settings:
+    # drop the cached settings, e.g. after changing environment variables in tests
+    get_settings.cache_clear()
+    for callback in _refresh_callbacks:
+        callback()
+    return get_settings()
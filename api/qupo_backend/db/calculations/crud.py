@@ -1,3 +1,5 @@
+from typing import List
+
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.mutable import MutableList
 
@@ -16,6 +18,25 @@ def get_calculation(db: Session, calculation: schemas.CalculationBase):
         first()
 
 
+def get_calculations(db: Session, model_names: List[str], calculation: schemas.CalculationBase):
+    # stored calculations of all given models with the symbols, weights and timeframe of the given calculation,
+    # fetched with a single query; the model of the given calculation itself is ignored
+    rows = db.query(models.Calculation, models.Result). \
+        join(models.Result, models.Calculation.id == models.Result.calculation_id). \
+        filter(models.Calculation.model.in_(model_names)). \
+        filter(models.Calculation.risk_weight == calculation.risk_weight). \
+        filter(models.Calculation.esg_weight == calculation.esg_weight). \
+        filter(models.Calculation.symbols == MutableList(calculation.symbols)). \
+        filter(models.Calculation.start == calculation.start). \
+        filter(models.Calculation.end == calculation.end). \
+        all()
+
+    db_calculations = {}
+    for row in rows:
+        db_calculations.setdefault(row.Calculation.model, row)
+    return db_calculations
+
+
 def get_result(db: Session, id: int):
     return db.query(models.Result). \
         where(models.Result.calculation_id == id). \
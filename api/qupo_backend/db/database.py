@@ -3,9 +3,9 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from .stocks import models
-from ..config import settings
+from ..config import get_settings
 
-DATABASE_URL = settings.sqllite_db_url
+DATABASE_URL = get_settings().sqllite_db_url
 
 engine = create_engine(DATABASE_URL, connect_args={'check_same_thread': False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -14,7 +14,7 @@ Base = declarative_base()
 
 
 def get_db():
-    if (settings.use_db):
+    if (get_settings().use_db):
         models.Base.metadata.create_all(bind=engine)
         db = SessionLocal()
         try:
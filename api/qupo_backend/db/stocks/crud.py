@@ -1,4 +1,5 @@
 from typing import List
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from . import models, schemas
@@ -23,6 +24,33 @@ def get_history(db: Session, stock: schemas.StockBase, start, end):
         all()
 
 
+def get_stocks(db: Session, symbols: List[str]):
+    return db.query(models.Stock). \
+        where(models.Stock.symbol.in_(symbols)). \
+        all()
+
+
+def get_infos(db: Session, symbols: List[str]):
+    return db.query(models.Info). \
+        where(models.Info.symbol.in_(symbols)). \
+        all()
+
+
+def get_histories(db: Session, symbols: List[str], start, end):
+    return db.query(models.History). \
+        where(models.History.symbol.in_(symbols)). \
+        filter(models.History.date.between(start, end)). \
+        order_by(models.History.id). \
+        all()
+
+
+def get_last_history_dates(db: Session, symbols: List[str]):
+    return db.query(models.History.symbol, func.max(models.History.date)). \
+        where(models.History.symbol.in_(symbols)). \
+        group_by(models.History.symbol). \
+        all()
+
+
 def create_stock(db: Session, stock: schemas.StockCreate):
     db_stock = models.Stock(symbol=stock.symbol)
     db.add(db_stock)
@@ -1,4 +1,5 @@
 import json
+import threading
 import yfinance
 
 from datetime import datetime
@@ -9,6 +10,9 @@ from . import crud, schemas
 from pytickersymbols import PyTickerSymbols
 stock_data = PyTickerSymbols()
 
+# concurrent requests may download the same stock, only the db inserts are serialized
+_insert_lock = threading.Lock()
+
 
 def get_data_in_timeframe(db: Session, stock: schemas.StockBase, start, end):
     info = crud.get_info(db, stock)
@@ -18,6 +22,20 @@ def get_data_in_timeframe(db: Session, stock: schemas.StockBase, start, end):
                          info=[info], history=history)
 
 
+def get_data_in_timeframe_of_symbols(db: Session, symbols, start, end):
+    infos = {}
+    for info in crud.get_infos(db, symbols):
+        infos.setdefault(info.symbol, info)
+    histories = {symbol: [] for symbol in symbols}
+    for history in crud.get_histories(db, symbols, start, end):
+        histories[history.symbol].append(history)
+
+    return {created_stock.symbol: schemas.Stock(id=created_stock.id, symbol=created_stock.symbol,
+                                                timestamp=created_stock.timestamp, info=[infos.get(created_stock.symbol)],
+                                                history=histories[created_stock.symbol])
+            for created_stock in crud.get_stocks(db, symbols)}
+
+
 def get_data_from_yahoo(symbol: str, period: str):
     data = yfinance.Ticker(symbol)
     yhistory = json.loads(data.history(period=period, auto_adjust=False).to_json(orient='split'))
@@ -61,10 +79,13 @@ def save_finance_data(db: Session, stock: schemas.StockBase, start, end):
                                   currency=data.info.get('currency', 'unknown'),
                                   sustainability=sustainability)
 
-        crud.create_stock(db, stock)
-        crud.create_stock_info(db, info, stock.symbol)
-        crud.create_stock_history(db, history, stock.symbol)
-        db.commit()
+        with _insert_lock:
+            # another request might have stored the stock while downloading
+            if crud.get_stock(db, stock) is None:
+                crud.create_stock(db, stock)
+                crud.create_stock_info(db, info, stock.symbol)
+                crud.create_stock_history(db, history, stock.symbol)
+                db.commit()
 
         return get_data_in_timeframe(db, stock, start, end)
 
@@ -75,15 +96,19 @@ def update_history(db: Session, stock: schemas.StockBase, last_date, start, end)
     _, yhistory = get_data_from_yahoo(stock.symbol, 'max')
 
     if (len(yhistory['data']) > 0):
-        history = []
-        for i in range(len(yhistory['index'])):
-            date = datetime.date(datetime.fromtimestamp(yhistory['index'][i] / 1000.0))
-            if (date > last_date):
-                row = construct_history_row(date, yhistory['data'][i])
-                history.append(row)
-
-        crud.create_stock_history(db, history, stock.symbol)
-        db.commit()
+        with _insert_lock:
+            # another request might have appended the new history while downloading
+            stored_last_date = dict(crud.get_last_history_dates(db, [stock.symbol])).get(stock.symbol, last_date)
+            last_date = max(last_date, stored_last_date)
+            history = []
+            for i in range(len(yhistory['index'])):
+                date = datetime.date(datetime.fromtimestamp(yhistory['index'][i] / 1000.0))
+                if (date > last_date):
+                    row = construct_history_row(date, yhistory['data'][i])
+                    history.append(row)
+
+            crud.create_stock_history(db, history, stock.symbol)
+            db.commit()
         return get_data_in_timeframe(db, stock, start, end)
 
     return None
@@ -1,89 +1,136 @@
 # native packages
-from dataclasses import dataclass
-from dotenv import load_dotenv
 from enum import Enum
-import os
+from functools import lru_cache
+import threading
 import warnings
 
 # 3rd party packages
-from azure.quantum import Workspace
-from azure.quantum.qiskit import AzureQuantumProvider
-from azure.identity import ClientSecretCredential
-from azure.quantum.optimization import (SimulatedAnnealing, PopulationAnnealing, ParallelTempering, Tabu,
-                                        QuantumMonteCarlo, SubstochasticMonteCarlo)
+# the azure quantum and qiskit sdks are imported within the functions using them,
+# so processes only running the classical solvers do not pay for loading them
 import numpy as np
 import osqp
-import pypfopt
-from qiskit import IBMQ
-from qiskit import Aer
-from qiskit.algorithms import QAOA
-from qiskit.algorithms.optimizers import COBYLA
-from qiskit.utils import QuantumInstance
-from qiskit.providers.ibmq import IBMQAccountError
-from qiskit_optimization.algorithms import MinimumEigenOptimizer
+from scipy import sparse
 
 # custom packages
+from qupo_backend.config import get_settings, on_settings_refresh
 from .optimization_classes import Result
 from .model_converter import convert_qubo_to_azureqio_model
 
-load_dotenv()
-
 
 def run_job(job):
-    try:
-        variable_values, objective_value, time_to_solution = Providers(job.solver.provider_name).run_job(job)
-    except TypeError:
+    provider = _PROVIDERS_BY_NAME.get(job.solver.provider_name)
+    if provider is None:
         warnings.warn(f'Provider {job.solver.provider_name} not available')
-    try:
-        job.result = Result(variable_values * 100, objective_value, time_to_solution)
-    except TypeError:
+        return
+
+    variable_values, objective_value, time_to_solution = provider.run_job(job)
+    if variable_values is None:
         warnings.warn('Solver did not return variable values')
+        return
+
+    # the runners hand over freshly computed arrays, so they are scaled to percent in place
+    variable_values = np.asarray(variable_values, dtype=np.float64)
+    np.multiply(variable_values, 100, out=variable_values)
+    job.result = Result(variable_values, objective_value, time_to_solution)
 
 
 def run_pypo_job(job):
+    # pypfopt max_quadratic_utility (excl. sustainability measures): maximize mu*x - 0.5*risk_aversion*x^T*Sigma*x
+    # with long only weights summing up to 1, i.e. the simplex constraints already encoded in A, l and u.
+    # It is solved as osqp problem directly, which skips the cvxpy problem compilation of pypfopt on every call
     df = job.problem.dataframe
-    efficient_frontier = pypfopt.efficient_frontier.EfficientFrontier(df.RateOfReturn, df.iloc[:, -len(df.index):])
-    raw_result = efficient_frontier.max_quadratic_utility(risk_aversion=job.problem.risk_weight, market_neutral=False)
-    variable_values = np.array(list(raw_result.values()))
+    P = sparse.csc_matrix(df.iloc[:, -len(df.index):].to_numpy()) * job.problem.risk_weight
+    q = -df.RateOfReturn.to_numpy()
+    raw_result = solve_osqp(P, q, job.problem.A, job.problem.l, job.problem.u)
+    variable_values = raw_result.x
     objective_value = job.problem.calc_objective_value(variable_values)
     time_to_solution = None
     return variable_values, objective_value, time_to_solution
 
 
-def run_osqp_job(job):
-    osqp_job = osqp.OSQP()
+# osqp workspaces keyed by the sparsity pattern of P and A, reusing them skips the KKT factorization
+_OSQP_CACHE = {}
+_OSQP_CACHE_SIZE = 16
+_osqp_lock = threading.Lock()
+
 
-    # Setup workspace and change alpha parameter
-    osqp_job.setup(job.problem.P, job.problem.q, job.problem.A, job.problem.l, job.problem.u,
-                   alpha=1, polish=True, eps_rel=1E-10, max_iter=100000)
+def _osqp_structure_key(P, A):
+    return (P.shape, A.shape, P.indptr.tobytes(), P.indices.tobytes(), A.indptr.tobytes(), A.indices.tobytes())
 
-    raw_result = osqp_job.solve()
+
+def solve_osqp(P, q, A, l, u):
+    # osqp only uses the upper triangular part of P, updates have to provide the same entries
+    P = sparse.triu(P, format='csc')
+    P.sort_indices()
+    A = sparse.csc_matrix(A)
+    A.sort_indices()
+    key = _osqp_structure_key(P, A)
+
+    with _osqp_lock:
+        osqp_job = _OSQP_CACHE.get(key)
+        if osqp_job is None:
+            osqp_job = osqp.OSQP()
+            # Setup workspace and change alpha parameter
+            osqp_job.setup(P, q, A, l, u, alpha=1, polish=True, eps_rel=1E-6, max_iter=10000, warm_start=True)
+            if len(_OSQP_CACHE) >= _OSQP_CACHE_SIZE:
+                _OSQP_CACHE.pop(next(iter(_OSQP_CACHE)))
+            _OSQP_CACHE[key] = osqp_job
+        else:
+            # same structure: only update the values, the solver warm starts from the previous solution
+            osqp_job.update(Px=P.data, Ax=A.data, q=q, l=l, u=u)
+
+        return osqp_job.solve()
+
+
+def run_osqp_job(job):
+    raw_result = solve_osqp(job.problem.P, job.problem.q, job.problem.A, job.problem.l, job.problem.u)
     variable_values = raw_result.x
     objective_value = raw_result.info.obj_val
     time_to_solution = raw_result.info.run_time
     return variable_values, objective_value, time_to_solution
 
 
-def configure_azure_provider(quantum=False):
-    credential = ClientSecretCredential(tenant_id=os.getenv('AZURE_TENANT_ID'),
-                                        client_id=os.getenv('AZURE_CLIENT_ID'),
-                                        client_secret=os.getenv('AZURE_CLIENT_SECRET'))
+@lru_cache(maxsize=1)
+def _get_azure_credential():
+    from azure.identity import ClientSecretCredential
+
+    # share one credential (and its token cache) across all azure jobs
+    settings = get_settings()
+    return ClientSecretCredential(tenant_id=settings.azure_tenant_id,
+                                  client_id=settings.azure_client_id,
+                                  client_secret=settings.azure_client_secret)
+
+
+@lru_cache(maxsize=2)
+def _get_azure_provider(quantum):
+    from azure.quantum import Workspace
+    from azure.quantum.qiskit import AzureQuantumProvider
+
+    settings = get_settings()
+    credential = _get_azure_credential()
     if quantum:
-        azure_provider = AzureQuantumProvider(subscription_id=os.getenv('AZURE_SUBSCRIPTION_ID'),
-                                              resource_group=os.getenv('AZURE_RESOURCE_GROUP'),
-                                              name=os.getenv('AZURE_NAME'),
-                                              location=os.getenv('AZURE_LOCATION'),
+        azure_provider = AzureQuantumProvider(subscription_id=settings.azure_subscription_id,
+                                              resource_group=settings.azure_resource_group,
+                                              name=settings.azure_name,
+                                              location=settings.azure_location,
                                               credential=credential)
     else:
-        azure_provider = Workspace(subscription_id=os.getenv('AZURE_SUBSCRIPTION_ID'),
-                                   resource_group=os.getenv('AZURE_RESOURCE_GROUP'),
-                                   name=os.getenv('AZURE_NAME'),
-                                   location=os.getenv('AZURE_LOCATION'),
+        azure_provider = Workspace(subscription_id=settings.azure_subscription_id,
+                                   resource_group=settings.azure_resource_group,
+                                   name=settings.azure_name,
+                                   location=settings.azure_location,
                                    credential=credential)
     return azure_provider
 
 
+def configure_azure_provider(quantum=False):
+    return _get_azure_provider(bool(quantum))
+
+
 def run_qio_job(job):
+    from azure.quantum.optimization import (SimulatedAnnealing, PopulationAnnealing, ParallelTempering, Tabu,
+                                            QuantumMonteCarlo, SubstochasticMonteCarlo)
+
     provider = configure_azure_provider()
     try:
         if job.solver.algorithm == 'SA':
@@ -105,13 +152,13 @@ def run_qio_job(job):
                                                  seed=48)
         else:
             warnings.warn('QIO solver not implemented - choose from: SA, PA, PT, Tabu, QMC, SMC')
+            return None, None, None
 
         azure_qio_problem = convert_qubo_to_azureqio_model(job.problem.qubo_problem)
         result = qio_solver.optimize(azure_qio_problem)
         raw_result = job.problem.converter.interpret(list(result['configuration'].values())) * job.problem.resolution
         variable_values = raw_result
-        objective_value = 0.5 * np.dot(variable_values, job.problem.P.dot(variable_values)) + np.dot(job.problem.q,
-                                                                                                     variable_values)
+        objective_value = job.problem.calc_objective_value(variable_values)
         time_to_solution = job.solver.config['timeout']
         return variable_values, objective_value, time_to_solution
     except TypeError:
@@ -120,21 +167,67 @@ def run_qio_job(job):
         return None, None, None
 
 
+_ibmq_provider = None
+_ibmq_lock = threading.Lock()
+
+
 def configure_qiskit_provider():
-    try:
-        IBMQ.enable_account(os.getenv('IBMQ_CLIENT_SECRET'))
-    except IBMQAccountError:
-        warnings.warn('IBM account not available. Please check ibmq health status and credentials')
-        pass
-    provider = IBMQ.get_provider(
-        hub='ibm-q',
-        group='open',
-        project='main'
-    )
-    return provider
+    global _ibmq_provider
+    if _ibmq_provider is not None:
+        return _ibmq_provider
+
+    with _ibmq_lock:
+        # another thread might have enabled the account while waiting for the lock
+        if _ibmq_provider is not None:
+            return _ibmq_provider
+
+        from qiskit import IBMQ
+        from qiskit.providers.ibmq import IBMQAccountError
+
+        settings = get_settings()
+        try:
+            IBMQ.enable_account(settings.ibmq_client_secret)
+        except IBMQAccountError:
+            warnings.warn('IBM account not available. Please check ibmq health status and credentials')
+            pass
+        _ibmq_provider = IBMQ.get_provider(
+            hub='ibm-q',
+            group='open',
+            project='main'
+        )
+    return _ibmq_provider
+
+
+@on_settings_refresh
+def reset_providers():
+    # the cached providers were configured with the credentials of the previous settings
+    global _ibmq_provider
+    _get_azure_credential.cache_clear()
+    _get_azure_provider.cache_clear()
+    with _ibmq_lock:
+        if _ibmq_provider is not None:
+            from qiskit import IBMQ
+
+            IBMQ.disable_account()
+            _ibmq_provider = None
+
+
+@lru_cache(maxsize=1)
+def _get_qiskit_quantum_instance():
+    from qiskit import Aer
+    from qiskit.utils import QuantumInstance
+
+    # the simulator backend and seeds never change, so backend lookup and capability probing happen once
+    simulator_backend = Aer.get_backend('aer_simulator')
+    seed = 42
+    return QuantumInstance(backend=simulator_backend, seed_simulator=seed, seed_transpiler=seed)
 
 
 def run_quantum_job(job, quantum_instance, repetitions):
+    from qiskit.algorithms import QAOA
+    from qiskit.algorithms.optimizers import COBYLA
+    from qiskit_optimization.algorithms import MinimumEigenOptimizer
+
     # Implementation according to https://qiskit.org/documentation/finance/tutorials/01_portfolio_optimization.html
     qp = job.problem.quadratic_problem
     cobyla = COBYLA()
@@ -144,8 +237,7 @@ def run_quantum_job(job, quantum_instance, repetitions):
     qaoa = MinimumEigenOptimizer(qaoa_algorithm)
     raw_result = qaoa.solve(qp)
     variable_values = raw_result.x
-    objective_value = 0.5 * np.dot(variable_values, job.problem.P.dot(variable_values)) + np.dot(job.problem.q,
-                                                                                                 variable_values)
+    objective_value = job.problem.calc_objective_value(variable_values)
     time_to_solution = None
 
     return variable_values, objective_value, time_to_solution
@@ -153,14 +245,12 @@ def run_quantum_job(job, quantum_instance, repetitions):
 
 def run_qiskit_job(job):
     configure_qiskit_provider()
-    simulator_backend = Aer.get_backend('aer_simulator')
-    seed = 42
-    quantum_instance = QuantumInstance(backend=simulator_backend, seed_simulator=seed, seed_transpiler=seed)
-
-    return run_quantum_job(job, quantum_instance, 3)
+    return run_quantum_job(job, _get_qiskit_quantum_instance(), 3)
 
 
 def run_ionq_job(job):
+    from qiskit.utils import QuantumInstance
+
     provider = configure_azure_provider(quantum=True)
     simulator_backend = provider.get_backend('ionq.simulator')
     quantum_instance = QuantumInstance(backend=simulator_backend)
@@ -168,7 +258,15 @@ def run_ionq_job(job):
     return run_quantum_job(job, quantum_instance, 1)
 
 
-@dataclass
+_RUNNERS = {
+    'pypo': run_pypo_job,
+    'osqp': run_osqp_job,
+    'qio': run_qio_job,
+    'qiskit': run_qiskit_job,
+    'ionq': run_ionq_job
+}
+
+
 class Providers(Enum):
     pypo = 'pypfopt'
     osqp = 'osqp'
@@ -177,4 +275,7 @@ class Providers(Enum):
     ionq = 'azure_ionq'
 
     def run_job(self, job):
-        return eval('run_' + self.name + '_job(job)')
+        return _RUNNERS[self.name](job)
+
+
+_PROVIDERS_BY_NAME = {provider.value: provider for provider in Providers}
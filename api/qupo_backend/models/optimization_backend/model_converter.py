@@ -1,9 +1,7 @@
-import dimod
-import azure.quantum.optimization as quantum_optimization
-from docplex.mp.model import Model as docplexModel
 import numpy as np
-from qiskit_optimization.converters import QuadraticProgramToQubo as Qp2Qubo
-from qiskit_optimization.translators import from_docplex_mp
+
+# dimod, docplex, qiskit and azure quantum are imported within the converters,
+# so they are only loaded once a quantum model is actually requested
 
 
 def convert_osqp_to_docplex_model(P, q, A, l, u, resolution=1E3):
@@ -15,6 +13,8 @@ def convert_osqp_to_docplex_model(P, q, A, l, u, resolution=1E3):
     #      q - objective vector, l/u - constraint lower/upper bound vector, A - constraint matrix
     # output: docplex model as basis for all quantum and quantum inspired models
     # https://qiskit.org/documentation/tutorials/optimization/1_quadratic_program.html
+    from docplex.mp.model import Model as docplexModel
+
     discrete_l = resolution * l
     discrete_u = resolution * u
     length_objective_vector = len(q)
@@ -30,6 +30,9 @@ def convert_osqp_to_docplex_model(P, q, A, l, u, resolution=1E3):
 
 def approximate_docplex_by_qubo_model(dpx_model):
     # approximate the exact docplex model by a quadratic binary unconstrained model
+    from qiskit_optimization.converters import QuadraticProgramToQubo as Qp2Qubo
+    from qiskit_optimization.translators import from_docplex_mp
+
     qp = from_docplex_mp(dpx_model)
     qp2qubo = Qp2Qubo()
     qubo = qp2qubo.convert(qp)
@@ -37,6 +40,8 @@ def approximate_docplex_by_qubo_model(dpx_model):
 
 
 def convert_qubo_to_azureqio_model(qubo):
+    import azure.quantum.optimization as quantum_optimization
+
     qubo_dict_lin = qubo.objective.linear.to_dict()
     qubo_dict_quad = qubo.objective.quadratic.to_dict()
     # Convert keys to string
@@ -53,6 +58,8 @@ def convert_qubo_to_azureqio_model(qubo):
 
 def convert_qubo_to_dimod_model(qubo):
     # convert qubo model to a dwave input format
+    import dimod
+
     qubo_dict_lin = qubo.objective.linear.to_dict()
     qubo_dict_quad = qubo.objective.quadratic.to_dict()
     bqm = dimod.BinaryQuadraticModel(qubo_dict_lin, qubo_dict_quad, 0, dimod.BINARY)
@@ -2,6 +2,7 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from scipy import sparse
+from scipy.linalg import blas
 
 # 3rd party packages
 import numpy as np
@@ -52,13 +53,33 @@ class Problem:
         self.num_constraints = len(self.l)
         self.sparsity = np.round(sum([tensor.getnnz() for tensor in [self.P, self.A]]) / sum(
             [tensor.shape[0] * tensor.shape[1] for tensor in [self.P, self.A]]) * 100, 2)
+        self._init_objective_matrix()
         if self.resolution is not None:
             self.docplex_problem = convert_osqp_to_docplex_model(self.P, self.q, self.A, self.l, self.u,
                                                                  resolution=self.resolution)
             self.quadratic_problem, self.qubo_problem, self.converter = approximate_docplex_by_qubo_model(self.docplex_problem)
 
+    def _init_objective_matrix(self):
+        # cache P once in the format with the cheapest matrix-vector product for the objective value:
+        # sparse P (e.g. block structured qubo penalties) as csr, dense P (e.g. full covariance) as blas array
+        nnz = self.P.getnnz() if sparse.issparse(self.P) else np.count_nonzero(self.P)
+        size = self.P.shape[0] * self.P.shape[1]
+        if size > 0 and nnz / size < 0.3:
+            self._objective_matrix = sparse.csr_matrix(self.P)
+            self._symmetric_objective = False
+        else:
+            dense_P = self.P.toarray() if sparse.issparse(self.P) else self.P
+            self._objective_matrix = np.asfortranarray(dense_P, dtype=np.float64)
+            self._symmetric_objective = np.allclose(self._objective_matrix, self._objective_matrix.T)
+
     def calc_objective_value(self, variable_values):
-        return 0.5 * np.dot(variable_values, self.P.dot(variable_values)) + np.dot(self.q, variable_values)
+        variable_values = np.asarray(variable_values, dtype=np.float64)
+        if self._symmetric_objective:
+            # symmetric matrix-vector product only reads one triangle of P
+            Px = blas.dsymv(1.0, self._objective_matrix, variable_values)
+        else:
+            Px = self._objective_matrix @ variable_values
+        return 0.5 * np.dot(variable_values, Px) + np.dot(self.q, variable_values)
 
 
 @ dataclass
@@ -1,3 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+import numpy as np
 import pandas as pd
 
 from .finance_classes import Stock, PortfolioModel
@@ -5,22 +9,23 @@ from .finance_utilities import convert_business_to_osqp_model
 from .optimization_backend.backend_runner import Providers, run_job
 from .optimization_backend.optimization_classes import Problem, Job, Solver
 
-from qupo_backend.config import settings
+from qupo_backend.config import get_settings
 import qupo_backend.db.calculations.schemas as calc_schemas
 import qupo_backend.db.calculations.crud as crud
 import qupo_backend.db.stocks.schemas as stock_schemas
-from qupo_backend.tickers_utilities import get_data_of_symbol, stock_data_to_dataframe
+from qupo_backend.tickers_utilities import get_data_of_symbols, stock_data_to_dataframe
 
 
 def portfolio_df_from_stock_data(db, symbols, start, end):
     # create stock and portfolio objects for frontend
     stocks = []
+    stocks_data = get_data_of_symbols([stock_schemas.StockBase(symbol=symbol) for symbol in symbols], start, end, db)
 
     for symbol in symbols:
-        stock_data = get_data_of_symbol(stock_schemas.StockBase(symbol=symbol), start, end, db)
+        stock_data = stocks_data.get(symbol)
         if (stock_data):
-            close_values = [h.close for h in stock_data.history]
-            stock = Stock(pd.Series(data=close_values), ticker=symbol, full_name=stock_data.info[0].name,
+            close_values = np.fromiter((h.close for h in stock_data.history), dtype=np.float64, count=len(stock_data.history))
+            stock = Stock(pd.Series(data=close_values, copy=False), ticker=symbol, full_name=stock_data.info[0].name,
                           historic_esg_value=stock_data.info[0].sustainability)
             stocks = stocks + [stock]
 
@@ -31,8 +36,9 @@ def portfolio_df_from_stock_data(db, symbols, start, end):
     return portfolio_model_df, portfolio_model
 
 
-def calculate_model(db, model, symbols, risk_weight, esg_weight, start, end):
-    portfolio_model_df, portfolio_model = portfolio_df_from_stock_data(db, symbols, start, end)
+def calculate_model(portfolio_model_df, portfolio_model, model, risk_weight, esg_weight):
+    # the models of a request share the stock data, every model writes its weights into its own copy
+    portfolio_model_df = portfolio_model_df.copy()
     # create abstract representation of problem (to identify and leverage hidden structure)
     P, q, A, l, u = convert_business_to_osqp_model(portfolio_model_df, risk_weight, esg_weight)
 
@@ -56,9 +62,11 @@ def calculate_model(db, model, symbols, risk_weight, esg_weight, start, end):
     rate_of_return_value, risk, esg_value = portfolio_model.get_evaluation(portfolio_model_df,
                                                                            job.result.variable_values)
 
-    solution_output_percent = dict(zip(list(job.problem.dataframe.index), job.result.variable_values.round(2)))
-    portfolio_model_df['RateOfReturn'].update(pd.Series(solution_output_percent))
-    data = portfolio_model_df.iloc[:, 0:3]
+    # the variable values are ordered like the dataframe index, so the weights can be assigned without alignment;
+    # they are not needed unrounded after the evaluation anymore and are rounded in place
+    weights = np.round(job.result.variable_values, 2, out=job.result.variable_values)
+    portfolio_model_df['RateOfReturn'] = weights
+    data = {column: portfolio_model_df[column] for column in portfolio_model_df.columns[:3]}
 
     return {
         **data,
@@ -78,37 +86,63 @@ def check_weights(metadata):
     return metadata
 
 
-def get_model_calculations(db, models, metadata):
-    results = []
-    metadata = check_weights(metadata)
+def save_model_calculation(db, calculation, result):
+    calculation.symbol_names = result['symbol_names']
+    calculation_saved = crud.create_calculation(db, calculation)
+    result_to_save = calc_schemas.ResultCreate(rate_of_return=result['RateOfReturn'], esg_rating=result['ESGRating'],
+                                               volatility=result['Volatility'], objective_value=result['objective_value'],
+                                               rate_of_return_value=result['rate_of_return_value'], risk=result['risk'],
+                                               esg_value=result['esg_value'])
+    crud.create_result(db, result_to_save, calculation_saved.id)
+    return crud.get_calculation(db, calculation)
+
 
-    for index, model in enumerate(models):
-        calculation = calc_schemas.CalculationBase(model=model, **metadata)
+def new_model_calculation(index, calculation, result):
+    new_calc = calc_schemas.Calculation(id=index, **calculation.dict())
+    new_result = calc_schemas.Result(id=index, calculation_id=index, rate_of_return=result['RateOfReturn'],
+                                     esg_rating=result['ESGRating'], volatility=result['Volatility'],
+                                     objective_value=result['objective_value'], rate_of_return_value=result['rate_of_return_value'],
+                                     risk=result['risk'], esg_value=result['esg_value'])
+    return {'Calculation': new_calc, 'Result': new_result}
 
+
+def get_model_calculations(db, models, metadata):
+    settings = get_settings()
+    metadata = check_weights(metadata)
+    calculations = [calc_schemas.CalculationBase(model=model, **metadata) for model in models]
+    results = [None] * len(calculations)
+
+    if (settings.use_db and len(calculations) > 0):
+        # look up all stored calculations with a single query and only calculate the missing models
+        db_calculations = crud.get_calculations(db, models, calculations[0])
+        results = [db_calculations.get(calculation.model) for calculation in calculations]
+
+    missing = [index for index, result in enumerate(results) if result is None]
+    if (len(missing) == 0):
+        return results
+
+    # the stock data is read (and downloaded if necessary) once, before the models are solved
+    portfolio_model_df, portfolio_model = portfolio_df_from_stock_data(db, metadata['symbols'], metadata['start'], metadata['end'])
+
+    # a model requested several times is solved and saved once, like the sequential lookup used to do
+    missing_models = list(dict.fromkeys(calculations[index].model for index in missing))
+
+    # the providers are mostly waiting for remote quantum services, so only the solver calls run concurrently
+    with ThreadPoolExecutor(max_workers=min(len(missing_models), 8)) as executor:
+        model_results = dict(zip(missing_models,
+                                 executor.map(calculate_model, repeat(portfolio_model_df), repeat(portfolio_model),
+                                              missing_models, repeat(metadata['risk_weight']),
+                                              repeat(metadata['esg_weight']))))
+
+    # the db session of the request is only used by this thread
+    saved_calculations = {}
+    for index in missing:
+        model = calculations[index].model
         if (settings.use_db):
-            db_calculation = crud.get_calculation(db, calculation)
-
-            if db_calculation is None:
-                result = calculate_model(db, model, **metadata)
-
-                calculation.symbol_names = result['symbol_names']
-                calculation_saved = crud.create_calculation(db, calculation)
-                result_to_save = calc_schemas.ResultCreate(rate_of_return=result['RateOfReturn'], esg_rating=result['ESGRating'],
-                                                           volatility=result['Volatility'], objective_value=result['objective_value'],
-                                                           rate_of_return_value=result['rate_of_return_value'], risk=result['risk'],
-                                                           esg_value=result['esg_value'])
-                crud.create_result(db, result_to_save, calculation_saved.id)
-                db_calc = crud.get_calculation(db, calculation)
-                results.append(db_calc)
-            else:
-                results.append(db_calculation)
+            if model not in saved_calculations:
+                saved_calculations[model] = save_model_calculation(db, calculations[index], model_results[model])
+            results[index] = saved_calculations[model]
         else:
-            result = calculate_model(db, model, **metadata)
-            new_calc = calc_schemas.Calculation(id=index, **calculation.dict())
-            new_result = calc_schemas.Result(id=index, calculation_id=index, rate_of_return=result['RateOfReturn'],
-                                             esg_rating=result['ESGRating'], volatility=result['Volatility'],
-                                             objective_value=result['objective_value'], rate_of_return_value=result['rate_of_return_value'],
-                                             risk=result['risk'], esg_value=result['esg_value'])
-            results.append({'Calculation': new_calc, 'Result': new_result})
+            results[index] = new_model_calculation(index, calculations[index], model_results[model])
 
     return results
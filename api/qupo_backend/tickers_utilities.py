@@ -2,13 +2,14 @@ import json
 import pandas as pd
 from datetime import datetime
 from types import SimpleNamespace
+from typing import List
 
 import yfinance
 from sqlalchemy.orm import Session
 
-from .config import settings
+from .config import get_settings
 from .db.stocks import crud, schemas
-from .db.stocks.operations import (save_finance_data, get_data_in_timeframe,
+from .db.stocks.operations import (save_finance_data, get_data_in_timeframe, get_data_in_timeframe_of_symbols,
                                    update_history, deconstruct_yhistory, get_sustainability)
 from .models.finance_classes import PortfolioModel
 
@@ -56,6 +57,7 @@ def get_all_symbols(stock_data, symbols_only: bool):
 
 
 def get_data_of_symbol(stock: schemas.StockBase, start: str, end: str, db: Session):
+    settings = get_settings()
     try:
         if (settings.use_db):
             db_stock = crud.get_stock(db, stock)
@@ -87,6 +89,34 @@ def get_data_of_symbol(stock: schemas.StockBase, start: str, end: str, db: Sessi
         raise Exception(f'Unable to return stock data of symbol: {stock.symbol}. Error message: {e}')
 
 
+def get_data_of_symbols(stocks: List[schemas.StockBase], start: str, end: str, db: Session):
+    if (not get_settings().use_db):
+        return {stock.symbol: get_data_of_symbol(stock, start, end, db) for stock in stocks}
+
+    try:
+        symbols = [stock.symbol for stock in stocks]
+        last_dates = dict(crud.get_last_history_dates(db, symbols))
+        end_date = datetime.strptime(end, '%Y-%m-%d').date()
+
+        # stocks which are missing or outdated in the db are fetched from yahoo one by one,
+        # all others are read with a single query per table
+        data = {}
+        up_to_date_symbols = []
+        for stock in stocks:
+            date_last_entry = last_dates.get(stock.symbol)
+            if date_last_entry is None or date_last_entry < end_date:
+                data[stock.symbol] = get_data_of_symbol(stock, start, end, db)
+            else:
+                up_to_date_symbols.append(stock.symbol)
+
+        if (len(up_to_date_symbols) > 0):
+            data.update(get_data_in_timeframe_of_symbols(db, up_to_date_symbols, start, end))
+        return data
+
+    except Exception as e:
+        raise Exception(f'Unable to return stock data of symbols: {[stock.symbol for stock in stocks]}. Error message: {e}')
+
+
 def stock_data_to_dataframe(portfolio_model: PortfolioModel):
     expected_rate_of_return_pa = pd.DataFrame(data=portfolio_model.expected_rates_of_return_pa,
                                               index=portfolio_model.stocks_tickers,